@@ -1,28 +1,223 @@
 from flask import Flask, render_template, request, jsonify, send_file, url_for
 import cv2
+import numpy as np
 import hashlib
+import mmap
 import os
 import json
-import base64
+import sqlite3
+import io
 from werkzeug.utils import secure_filename
 from pymediainfo import MediaInfo
 import threading
+import queue
+from collections import OrderedDict
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import time
 from datetime import datetime
 
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    # RuntimeError/OSError: the Python package is installed but libturbojpeg isn't
+    turbo_jpeg = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max file size
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['SECRET_KEY'] = 'your-secret-key-here'
+app.config['REDIS_URL'] = os.environ.get('REDIS_URL')  # Share progress across workers when set
+app.config['HASH_ALGORITHM'] = os.environ.get('HASH_ALGORITHM', 'blake3')  # blake3, sha256 or sha256-sharded
+app.config['RESULT_CACHE'] = os.environ.get('RESULT_CACHE', 'analysis_cache.db')  # SQLite cache of finished analyses
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Global variables for analysis status
-analysis_progress = {}
-video_frames = {}
-
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'wmv', 'flv', 'webm'}
+HASH_CHUNK_SIZE = 16 * 1024 * 1024  # 16MB slices per hash update
+HASH_SHARD_SIZE = 64 * 1024 * 1024  # Fixed shard size for 'sha256-sharded', independent of core count
+UPLOAD_COPY_BUFFER = 8 * 1024 * 1024  # 8MB buffer when saving uploads
+FRAME_STRIDE = 10  # Analyze every 10th frame
+FRAME_QUEUE_SIZE = 32  # Decoded frames buffered ahead of analysis
+FRAME_BATCH_SIZE = 64  # Frames reduced per Numba kernel call
+ANALYSIS_FRAME_SIZE = (160, 90)  # Frames are downscaled to this before brightness analysis
+PREVIEW_JPEG_QUALITY = 80
+PROGRESS_TTL = 2 * 60 * 60  # Analysis state is dropped 2 hours after its last update
+PROGRESS_MAX_ENTRIES = 256  # Least recently updated analyses beyond this are evicted
+UPLOAD_MAX_AGE = 24 * 60 * 60  # Uploads older than a day are removed by the cleanup timer
+CLEANUP_INTERVAL = 24 * 60 * 60
+RESULT_CACHE_MAX_ENTRIES = 1024  # Least recently used cached analyses beyond this are dropped
+RESULT_CACHE_MAX_AGE = 24 * 60 * 60  # Cached analyses unused for a day are dropped
+
+class ProgressStore:
+    """Analysis state per file_id, expired PROGRESS_TTL seconds after the last write.
+
+    Backed by Redis when a URL is given (so every Gunicorn worker sees the same
+    state), otherwise by an in-process LRU capped at max_entries; an entry evicted
+    for either age or size also has its upload removed. Entries have the shape created in
+    perform_full_analysis; use update_field/set_result rather than mutating the
+    dict returned by get(), which is a copy.
+    """
+    
+    def __init__(self, redis_url=None, ttl=PROGRESS_TTL, max_entries=PROGRESS_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        
+        if redis_url and redis is None:
+            raise RuntimeError('REDIS_URL is set but the redis package is not installed (pip install redis)')
+        self.redis = redis.Redis.from_url(redis_url, decode_responses=True) if redis_url else None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        
+    def key(self, file_id):
+        return f'analysis:{file_id}'
+        
+    def create(self, file_id, entry, video_path=None):
+        if self.redis is not None:
+            key = self.key(file_id)
+            fields = {field: json.dumps(value) for field, value in entry.items() if field != 'results'}
+            for stage, value in entry.get('results', {}).items():
+                fields[f'results.{stage}'] = json.dumps(value)
+            pipe = self.redis.pipeline()
+            pipe.delete(key)
+            pipe.hset(key, mapping=fields)
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+            return
+            
+        with self.lock:
+            self.evict_expired()
+            self.entries[file_id] = {'entry': entry, 'updated': time.time(), 'video_path': video_path}
+            self.entries.move_to_end(file_id)
+            
+            while len(self.entries) > self.max_entries:
+                evicted_id, evicted = self.entries.popitem(last=False)
+                release_upload(evicted_id, evicted['video_path'])
+            
+    def get(self, file_id):
+        if self.redis is not None:
+            fields = self.redis.hgetall(self.key(file_id))
+            if not fields:
+                return None
+            entry = {'results': {}}
+            for field, value in fields.items():
+                if field.startswith('results.'):
+                    entry['results'][field[len('results.'):]] = json.loads(value)
+                else:
+                    entry[field] = json.loads(value)
+            return entry
+            
+        with self.lock:
+            item = self.entries.get(file_id)
+            if item is None or time.time() - item['updated'] > self.ttl:
+                return None
+            entry = item['entry']
+            return {**entry, 'results': dict(entry['results'])}
+            
+    def update_field(self, file_id, field, value):
+        self.write(file_id, field, value)
+        
+    def set_result(self, file_id, stage, value):
+        self.write(file_id, f'results.{stage}', value)
+        
+    def write(self, file_id, field, value):
+        if self.redis is not None:
+            key = self.key(file_id)
+            pipe = self.redis.pipeline()
+            pipe.hset(key, field, json.dumps(value))
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+            return
+            
+        with self.lock:
+            item = self.entries.get(file_id)
+            if item is None:
+                return
+            if field.startswith('results.'):
+                item['entry']['results'][field[len('results.'):]] = value
+            else:
+                item['entry'][field] = value
+            item['updated'] = time.time()
+            self.entries.move_to_end(file_id)
+            
+    def discard(self, file_id):
+        if self.redis is not None:
+            self.redis.delete(self.key(file_id))
+            return
+            
+        with self.lock:
+            self.entries.pop(file_id, None)
+            
+    def evict_expired(self):
+        # Caller holds self.lock
+        cutoff = time.time() - self.ttl
+        for file_id in [k for k, item in self.entries.items() if item['updated'] < cutoff]:
+            release_upload(file_id, self.entries.pop(file_id)['video_path'])
+
+def release_upload(file_id, video_path):
+    with video_frames_lock:
+        video_frames.pop(file_id, None)
+    if video_path:
+        try:
+            os.remove(video_path)
+        except OSError:
+            pass
+
+def find_upload(file_id):
+    prefix = f'{file_id}_'
+    for filename in os.listdir(app.config['UPLOAD_FOLDER']):
+        if filename.startswith(prefix):
+            return os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    return None
+
+def cached_preview(file_id):
+    with video_frames_lock:
+        return video_frames.get(file_id)
+
+def remember_preview(file_id, frame_jpeg):
+    with video_frames_lock:
+        video_frames[file_id] = frame_jpeg
+        video_frames.move_to_end(file_id)
+        while len(video_frames) > PROGRESS_MAX_ENTRIES:
+            video_frames.popitem(last=False)
+
+def cleanup_old_uploads():
+    # Upload names start with their unix timestamp, which is also the file_id
+    cutoff = time.time() - UPLOAD_MAX_AGE
+    
+    for filename in os.listdir(app.config['UPLOAD_FOLDER']):
+        file_id = filename.split('_', 1)[0]
+        if file_id.isdigit() and int(file_id) < cutoff:
+            analysis_progress.discard(file_id)
+            release_upload(file_id, os.path.join(app.config['UPLOAD_FOLDER'], filename))
+            
+    timer = threading.Timer(CLEANUP_INTERVAL, cleanup_old_uploads)
+    timer.daemon = True
+    timer.start()
+
+# Global variables for analysis status
+analysis_progress = ProgressStore(app.config['REDIS_URL'])
+video_frames = OrderedDict()  # file_id -> preview JPEG bytes
+video_frames_lock = threading.Lock()
+cleanup_started = False
+cleanup_lock = threading.Lock()
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -57,23 +252,76 @@ def extract_metadata(video_path):
     except Exception as e:
         return {'error': f'Error extracting metadata: {str(e)}'}
 
-def calculate_file_hash(path, file_id):
+def hash_range(hash_func, mv, start, end, report):
+    # Feed mv[start:end] to hash_func in large slices, reporting bytes done after each
+    offset = start
+    while offset < end:
+        chunk = mv[offset:min(offset + HASH_CHUNK_SIZE, end)]
+        size = len(chunk)
+        hash_func.update(chunk)
+        chunk.release()
+        offset += size
+        report(size)
+    return hash_func
+
+def hash_shard(mv, start, end, report):
+    return hash_range(hashlib.sha256(), mv, start, end, report).digest()
+
+def calculate_file_hash(path, file_id, algorithm='blake3'):
     try:
-        hash_func = hashlib.sha256()
         file_size = os.path.getsize(path)
         processed = 0
+        progress_lock = threading.Lock()
+        
+        def report(size):
+            # Called once per HASH_CHUNK_SIZE slice, so even a 500MB upload
+            # publishes only ~30 progress updates
+            nonlocal processed
+            with progress_lock:
+                processed += size
+                analysis_progress.update_field(file_id, 'hash_progress', (processed / file_size) * 100)
+                    
+        # BLAKE3 is a much faster content fingerprint; fall back to SHA-256 without it.
+        # 'sha256-sharded' hashes fixed-size shards in parallel and hashes their digests,
+        # which is deterministic but is not the plain SHA-256 of the file.
+        if algorithm == 'sha256-sharded':
+            hash_func = None
+            algorithm_name = 'SHA-256 (sharded tree)'
+        elif algorithm == 'blake3' and blake3 is not None:
+            hash_func = blake3.blake3(max_threads=blake3.blake3.AUTO)
+            algorithm_name = 'BLAKE3'
+        else:
+            hash_func = hashlib.sha256()
+            algorithm_name = 'SHA-256'
+            
+        shard_digests = []
         
         with open(path, "rb") as f:
-            while chunk := f.read(8192):
-                hash_func.update(chunk)
-                processed += len(chunk)
-                progress = (processed / file_size) * 100
-                analysis_progress[file_id]['hash_progress'] = progress
-                
-        hash_value = hash_func.hexdigest()
+            if file_size:
+                # Map the file and hash large slices so the native hasher does the work
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mm, 'madvise'):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    with memoryview(mm) as mv:
+                        if hash_func is not None:
+                            hash_range(hash_func, mv, 0, file_size, report)
+                        else:
+                            # hashlib releases the GIL, so threads hash shards in parallel
+                            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                                shard_digests = list(executor.map(
+                                    lambda start: hash_shard(mv, start, min(start + HASH_SHARD_SIZE, file_size), report),
+                                    range(0, file_size, HASH_SHARD_SIZE)
+                                ))
+                                
+        analysis_progress.update_field(file_id, 'hash_progress', 100)
+        
+        if hash_func is None:
+            hash_value = hashlib.sha256(b''.join(shard_digests)).hexdigest()
+        else:
+            hash_value = hash_func.hexdigest()
         
         result = {
-            'algorithm': 'SHA-256',
+            'algorithm': algorithm_name,
             'file_size': f"{file_size:,} bytes",
             'hash': hash_value,
             'hash_breakdown': [hash_value[i:i+16] for i in range(0, len(hash_value), 16)]
@@ -84,51 +332,179 @@ def calculate_file_hash(path, file_id):
     except Exception as e:
         return {'error': f'Error calculating hash: {str(e)}'}
 
+def frame_brightness(frame):
+    # cv2.mean uses OpenCV's SIMD reduction; fall back to NumPy for non-BGR frames
+    if frame.ndim == 3 and frame.shape[2] == 3:
+        b, g, r, _ = cv2.mean(frame)
+        return (b + g + r) / 3.0
+    return float(frame.mean())
+
+if njit is not None:
+    @njit(nogil=True, parallel=True, cache=True)
+    def brightness_kernel(frames, out):
+        # Mean of each frame in a (N, H, W, C) uint8 batch, spread across cores.
+        # Summing the raw bytes into an integer lets LLVM vectorize the reduction
+        # instead of converting every pixel to float.
+        for i in prange(frames.shape[0]):
+            pixels = frames[i].ravel()
+            total = np.uint64(0)
+            for j in range(pixels.size):
+                total += pixels[j]
+            out[i] = total / pixels.size
+            
+    brightness_kernel_lock = threading.Lock()
+    
+    def batch_brightness(frames, out):
+        # Concurrent uploads call this from several threads, and Numba's workqueue
+        # layer (the fallback without OpenMP/TBB) aborts the process on concurrent
+        # parallel calls. The kernel already uses every core, so serializing is cheap.
+        with brightness_kernel_lock:
+            brightness_kernel(frames, out)
+else:
+    batch_brightness = None
+
+def encode_preview_frame(frame):
+    frame = cv2.resize(frame, (640, 480))
+    
+    # libjpeg-turbo's SIMD encoder is noticeably faster than OpenCV's bundled libjpeg
+    if turbo_jpeg is not None:
+        buffer = turbo_jpeg.encode(frame, quality=PREVIEW_JPEG_QUALITY, pixel_format=TJPF_BGR)
+    else:
+        _, buffer = cv2.imencode('.jpg', frame, [
+            cv2.IMWRITE_JPEG_QUALITY, PREVIEW_JPEG_QUALITY,
+            cv2.IMWRITE_JPEG_OPTIMIZE, 0
+        ])
+        buffer = buffer.tobytes()
+        
+    return buffer
+
+def read_sampled_frames(cap, analysis_limit, frame_queue, stop_event):
+    # Producer for analyze_video_frames: queues (frame_number, frame) and a final None
+    try:
+        # Frames are sampled sequentially; seeking would re-decode from the last keyframe
+        frame_number = 0
+        grabbed = cap.grab()
+        
+        while grabbed and frame_number < analysis_limit and not stop_event.is_set():
+            ret, frame = cap.retrieve()
+            
+            if not ret:
+                break
+                
+            # Area-averaging keeps the mean brightness while touching far fewer bytes
+            if frame.shape[1] > ANALYSIS_FRAME_SIZE[0] and frame.shape[0] > ANALYSIS_FRAME_SIZE[1]:
+                frame = cv2.resize(frame, ANALYSIS_FRAME_SIZE, interpolation=cv2.INTER_AREA)
+                
+            frame_queue.put((frame_number, frame))
+            
+            # Advance to the next sampled frame without converting the skipped ones
+            for _ in range(FRAME_STRIDE):
+                grabbed = cap.grab()
+                if not grabbed:
+                    break
+                    
+            frame_number += FRAME_STRIDE
+            
+    except Exception as e:
+        frame_queue.put(e)
+        
+    frame_queue.put(None)
+
 def analyze_video_frames(video_path, file_id):
     try:
         cap = cv2.VideoCapture(video_path)
         frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         fps = cap.get(cv2.CAP_PROP_FPS)
         
-        dark_frames = []
-        bright_frames = []
-        normal_frames = 0
-        frame_number = 0
-        
         analysis_limit = min(frame_count, 1000)
         
-        while frame_number < analysis_limit:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-            ret, frame = cap.read()
+        # One slot per sampled frame; classification is done in bulk afterwards
+        brightness_values = np.empty(-(-analysis_limit // FRAME_STRIDE), dtype=np.float32)
+        sampled = 0
+        frame_batch = None
+        batched = 0
+        
+        # Decode on a separate thread so it overlaps with the brightness reduction
+        frame_queue = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+        stop_event = threading.Event()
+        reader = threading.Thread(
+            target=read_sampled_frames,
+            args=(cap, analysis_limit, frame_queue, stop_event)
+        )
+        reader.daemon = True
+        reader.start()
+        
+        item = None
+        try:
+            while True:
+                item = frame_queue.get()
             
-            if not ret:
-                break
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
                 
-            brightness = frame.mean()
-            
-            if brightness < 30:
-                dark_frames.append({'frame': frame_number, 'brightness': round(brightness, 2)})
-            elif brightness > 200:
-                bright_frames.append({'frame': frame_number, 'brightness': round(brightness, 2)})
-            else:
-                normal_frames += 1
+                frame_number, frame = item
                 
-            frame_number += 10
-            progress = (frame_number / analysis_limit) * 100
-            analysis_progress[file_id]['frame_progress'] = progress
+                if batch_brightness is None:
+                    brightness_values[sampled] = frame_brightness(frame)
+                else:
+                    # Streams can change resolution mid-file; reduce what we have and
+                    # start a new buffer for the new frame shape
+                    if frame_batch is not None and frame.shape != frame_batch.shape[1:]:
+                        if batched:
+                            batch_brightness(frame_batch[:batched], brightness_values[sampled - batched:sampled])
+                        frame_batch = None
+                        batched = 0
+                    if frame_batch is None:
+                        frame_batch = np.empty((FRAME_BATCH_SIZE,) + frame.shape, dtype=frame.dtype)
+                    frame_batch[batched] = frame
+                    batched += 1
+                    
+                sampled += 1
+                
+                if batched == FRAME_BATCH_SIZE:
+                    batch_brightness(frame_batch, brightness_values[sampled - batched:sampled])
+                    batched = 0
+                    
+                progress = min((frame_number + FRAME_STRIDE) / analysis_limit, 1) * 100
+                analysis_progress.update_field(file_id, 'frame_progress', progress)
+        finally:
+            # Unblock the reader if we stopped early, then wait for its sentinel
+            stop_event.set()
+            while item is not None:
+                item = frame_queue.get()
+            reader.join()
+            cap.release()
             
-        cap.release()
+        # Reduce whatever is left over from the last partial batch
+        if batched:
+            batch_brightness(frame_batch[:batched], brightness_values[sampled - batched:sampled])
+            
+        brightness_values = brightness_values[:sampled]
+        dark_idx = np.nonzero(brightness_values < 30)[0]
+        bright_idx = np.nonzero(brightness_values > 200)[0]
+        normal_frames = sampled - len(dark_idx) - len(bright_idx)
+        
+        dark_frames = [
+            {'frame': int(i) * FRAME_STRIDE, 'brightness': round(float(brightness_values[i]), 2)}
+            for i in dark_idx[:20]
+        ]
+        bright_frames = [
+            {'frame': int(i) * FRAME_STRIDE, 'brightness': round(float(brightness_values[i]), 2)}
+            for i in bright_idx[:20]
+        ]
         
         result = {
             'total_frames': f"{frame_count:,}",
             'frame_rate': f"{fps:.2f} fps",
             'duration': f"{frame_count/fps:.2f} seconds",
-            'dark_frames': dark_frames[:20],  # Limit to first 20
-            'bright_frames': bright_frames[:20],  # Limit to first 20
+            'dark_frames': dark_frames,  # Limited to first 20
+            'bright_frames': bright_frames,  # Limited to first 20
             'normal_frames': normal_frames,
             'summary': {
-                'dark_count': len(dark_frames),
-                'bright_count': len(bright_frames),
+                'dark_count': len(dark_idx),
+                'bright_count': len(bright_idx),
                 'normal_count': normal_frames
             }
         }
@@ -145,12 +521,9 @@ def get_video_frame(video_path, frame_number=0):
         ret, frame = cap.read()
         
         if ret:
-            # Resize frame
-            frame = cv2.resize(frame, (640, 480))
-            _, buffer = cv2.imencode('.jpg', frame)
-            frame_base64 = base64.b64encode(buffer).decode('utf-8')
+            frame_jpeg = encode_preview_frame(frame)
             cap.release()
-            return frame_base64
+            return frame_jpeg
         
         cap.release()
         return None
@@ -158,40 +531,119 @@ def get_video_frame(video_path, frame_number=0):
     except Exception as e:
         return None
 
+def open_result_cache():
+    conn = sqlite3.connect(app.config['RESULT_CACHE'])
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS analysis_results '
+        '(digest TEXT PRIMARY KEY, results TEXT NOT NULL, last_used REAL NOT NULL)'
+    )
+    return conn
+
+def load_cached_results(digest):
+    # Keyed by the full content hash, so a hit is always for byte-identical content
+    try:
+        with closing(open_result_cache()) as conn, conn:
+            row = conn.execute('SELECT results FROM analysis_results WHERE digest = ?', (digest,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE analysis_results SET last_used = ? WHERE digest = ?', (time.time(), digest))
+        return json.loads(row[0])
+    except sqlite3.Error:
+        return None
+
+def store_cached_results(digest, results):
+    try:
+        with closing(open_result_cache()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO analysis_results (digest, results, last_used) VALUES (?, ?, ?)',
+                (digest, json.dumps(results), time.time())
+            )
+            # Same policy as the in-process state: drop stale rows, then cap the size
+            conn.execute(
+                'DELETE FROM analysis_results WHERE last_used < ?',
+                (time.time() - RESULT_CACHE_MAX_AGE,)
+            )
+            conn.execute(
+                'DELETE FROM analysis_results WHERE digest NOT IN '
+                '(SELECT digest FROM analysis_results ORDER BY last_used DESC LIMIT ?)',
+                (RESULT_CACHE_MAX_ENTRIES,)
+            )
+    except sqlite3.Error:
+        pass
+
 def perform_full_analysis(video_path, file_id):
-    analysis_progress[file_id] = {
+    analysis_progress.create(file_id, {
         'status': 'running',
         'metadata_done': False,
         'hash_progress': 0,
         'frame_progress': 0,
         'results': {}
-    }
+    }, video_path)
     
     try:
-        # Extract metadata
-        analysis_progress[file_id]['status'] = 'Extracting metadata...'
-        metadata = extract_metadata(video_path)
-        analysis_progress[file_id]['results']['metadata'] = metadata
-        analysis_progress[file_id]['metadata_done'] = True
-        
-        # Calculate hash
-        analysis_progress[file_id]['status'] = 'Calculating file hash...'
-        hash_info = calculate_file_hash(video_path, file_id)
-        analysis_progress[file_id]['results']['hash'] = hash_info
+        # The stages spend their time in C code that releases the GIL (hashlib/BLAKE3,
+        # MediaInfo, OpenCV), so run them side by side. The hash is always computed
+        # from the file itself; only frame analysis waits for it, since byte-identical
+        # content can reuse a cached frame analysis.
+        analysis_progress.update_field(file_id, 'status', 'Analyzing video...')
+        results = {}
+        cache_key = None
+        cache_hit = False
         
-        # Analyze frames
-        analysis_progress[file_id]['status'] = 'Analyzing video frames...'
-        frame_analysis = analyze_video_frames(video_path, file_id)
-        analysis_progress[file_id]['results']['frames'] = frame_analysis
-        
-        # Get first frame for preview
-        first_frame = get_video_frame(video_path, 0)
-        analysis_progress[file_id]['results']['preview_frame'] = first_frame
-        
-        analysis_progress[file_id]['status'] = 'complete'
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            pending = {
+                executor.submit(calculate_file_hash, video_path, file_id, app.config['HASH_ALGORITHM']): 'hash',
+                executor.submit(extract_metadata, video_path): 'metadata'
+            }
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    stage = pending.pop(future)
+                    results[stage] = future.result()
+                    analysis_progress.set_result(file_id, stage, results[stage])
+                    
+                    if stage == 'metadata':
+                        analysis_progress.update_field(file_id, 'metadata_done', True)
+                    elif stage == 'hash':
+                        cached = None
+                        if 'error' not in results['hash']:
+                            cache_key = f"{results['hash']['algorithm']}:{results['hash']['hash']}"
+                            cached = load_cached_results(cache_key)
+                            
+                        if cached is not None:
+                            cache_hit = True
+                            analysis_progress.set_result(file_id, 'frames', cached['frames'])
+                            analysis_progress.update_field(file_id, 'frame_progress', 100)
+                            # Publish the cached metadata now if extraction hasn't finished yet
+                            if 'metadata' not in results:
+                                analysis_progress.set_result(file_id, 'metadata', cached['metadata'])
+                                analysis_progress.update_field(file_id, 'metadata_done', True)
+                        else:
+                            pending[executor.submit(analyze_video_frames, video_path, file_id)] = 'frames'
+                            
+        # Only cache complete runs so a transient failure isn't replayed
+        if cache_key is not None and not cache_hit and not any('error' in results[stage] for stage in results):
+            store_cached_results(cache_key, {'metadata': results['metadata'], 'frames': results['frames']})
+            
+        analysis_progress.update_field(file_id, 'status', 'complete')
         
     except Exception as e:
-        analysis_progress[file_id]['status'] = f'error: {str(e)}'
+        analysis_progress.update_field(file_id, 'status', f'error: {str(e)}')
+
+@app.before_request
+def start_upload_cleanup():
+    # Start the daily sweep once per process on first use rather than at import,
+    # so it also runs under WSGI servers while importing main stays side-effect free
+    global cleanup_started
+    if cleanup_started:
+        return
+    with cleanup_lock:
+        if cleanup_started:
+            return
+        cleanup_started = True
+    threading.Thread(target=cleanup_old_uploads, daemon=True).start()
 
 @app.route('/')
 def index():
@@ -213,7 +665,8 @@ def upload_file():
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         
         try:
-            file.save(filepath)
+            # Copy in large blocks rather than Werkzeug's default 16KB buffer
+            file.save(filepath, buffer_size=UPLOAD_COPY_BUFFER)
             file_id = timestamp
             
             # Start analysis in background thread
@@ -237,20 +690,45 @@ def upload_file():
 
 @app.route('/progress/<file_id>')
 def get_progress(file_id):
-    if file_id not in analysis_progress:
+    progress = analysis_progress.get(file_id)
+    if progress is None:
         return jsonify({'error': 'File not found'}), 404
     
-    return jsonify(analysis_progress[file_id])
+    return jsonify(progress)
 
 @app.route('/results/<file_id>')
 def get_results(file_id):
-    if file_id not in analysis_progress:
+    progress = analysis_progress.get(file_id)
+    if progress is None:
         return jsonify({'error': 'File not found'}), 404
     
-    if analysis_progress[file_id]['status'] == 'complete':
-        return jsonify(analysis_progress[file_id]['results'])
+    if progress['status'] == 'complete':
+        # The preview is served as a plain JPEG by /preview rather than inlined as base64,
+        # and is only offered while the upload it is decoded from still exists
+        results = dict(progress['results'])
+        if cached_preview(file_id) is not None or find_upload(file_id) is not None:
+            results['preview_url'] = url_for('get_preview', file_id=file_id)
+        return jsonify(results)
     
     return jsonify({'status': 'not_ready'})
 
+@app.route('/preview/<file_id>')
+def get_preview(file_id):
+    # Previews are decoded on first request rather than during analysis, then memoized
+    frame_jpeg = cached_preview(file_id)
+    
+    if frame_jpeg is None:
+        video_path = find_upload(file_id)
+        if video_path is None:
+            return jsonify({'error': 'File not found'}), 404
+            
+        frame_jpeg = get_video_frame(video_path, 0)
+        if frame_jpeg is None:
+            return jsonify({'error': 'Preview not available'}), 404
+            
+        remember_preview(file_id, frame_jpeg)
+        
+    return send_file(io.BytesIO(frame_jpeg), mimetype='image/jpeg')
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file